@@ -130,6 +130,23 @@ def test_propagate_true_no_exception_is_noop():
         _do_work_ok()
 
 
+def _do_work_swallow(msg: str = "swallowed"):
+    try:
+        _do_work_fail(msg)
+    except Exception:
+        # The step only observes its own frame; report errors swallowed in helpers explicitly
+        allure.note_exception()
+
+
+def test_propagate_note_exception_from_helper():
+    """
+    A helper swallows the error in its own frame and records it with allure.note_exception().
+    Expect: test PASSED; step B5 FAILED.
+    """
+    with allure.step("B5: helper swallows error but notes it", propagate=True):
+        _do_work_swallow("noted-in-helper")
+
+
 # ==========================================
 # C) step(..., raise_on_parent=...) SHOWCASE
 # ==========================================
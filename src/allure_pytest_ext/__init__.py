@@ -1,5 +1,5 @@
 from __future__ import annotations
 
-from .plugin import aggregate_step  # re-export for convenience
+from .plugin import aggregate_step, note_exception  # re-export for convenience
 
-__all__ = ["aggregate_step"]
+__all__ = ["aggregate_step", "note_exception"]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Callable, List, Optional, Tuple, Type, cast
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional, Tuple, Type
 from importlib import metadata
 import threading
 import warnings
@@ -8,16 +9,25 @@ import types
 import sys
 import os
 import logging
+from uuid import UUID, uuid4
 
 
 allure: Any
+# allure_commons step hook callers, bound once (pluggy keeps them stable as plugins register)
+_start_step_hook: Any
+_stop_step_hook: Any
 try:  # pragma: no cover - imported in test runtime
     import allure as _allure_mod
+    from allure_commons._core import plugin_manager as _allure_plugin_manager
 
     allure = _allure_mod
+    _start_step_hook = _allure_plugin_manager.hook.start_step
+    _stop_step_hook = _allure_plugin_manager.hook.stop_step
     _import_error: Optional[Exception] = None
 except Exception as import_error:  # pragma: no cover
     allure = None
+    _start_step_hook = None
+    _stop_step_hook = None
     _import_error = import_error
 
 
@@ -25,6 +35,13 @@ except Exception as import_error:  # pragma: no cover
 _ALLURE_MIN_VERSION = "2.13.3"
 _ALLURE_MAX_VERSION = "2.15.0"
 
+# Installed allure-pytest version, resolved once: importlib.metadata scans the distributions on sys.path
+_ALLURE_VERSION: Optional[str]
+try:
+    _ALLURE_VERSION = metadata.version("allure-pytest")
+except metadata.PackageNotFoundError:  # pragma: no cover
+    _ALLURE_VERSION = None
+
 
 def _parse_version_to_tuple(version_str: Optional[str]) -> Tuple[int, int, int]:
     """
@@ -65,157 +82,249 @@ def set_step_logging(enabled: bool) -> None:
     """
     Enable/disable logging of step start/end using the caller module's logger.
 
-    This affects both allure.step(...) and allure.aggregate_step(...).
+    This affects both allure.step(...) and allure.aggregate_step(...) entered after the call.
     """
     global _log_steps_enabled
     _log_steps_enabled = bool(enabled)
 
 
+def _start_allure_step(title: str) -> UUID:
+    # Drive allure's step lifecycle hooks directly (as allure.step's StepContext does) to avoid
+    # allocating an upstream context manager for every step
+    step_uuid = uuid4()
+    _start_step_hook(uuid=step_uuid, title=title, params={})
+    return step_uuid
+
+
+def _stop_allure_step(
+    step_uuid: UUID,
+    title: str,
+    exc_type: Optional[Type[BaseException]],
+    exc_val: Optional[BaseException],
+    exc_tb: Optional[types.TracebackType],
+) -> None:
+    _stop_step_hook(uuid=step_uuid, title=title, exc_type=exc_type, exc_val=exc_val, exc_tb=exc_tb)
+
+
 def _resolve_logger_for_frame(frame: types.FrameType) -> logging.Logger:
+    # logging keeps its own registry of loggers by name, so no cache is needed here
     module_name_obj = frame.f_globals.get("__name__", "__main__")
     module_name = module_name_obj if isinstance(module_name_obj, str) else "__main__"
     return logging.getLogger(module_name)
 
 
-def _maybe_log(logger: Optional[logging.Logger], level: int, message: str) -> None:
+def _maybe_log(logger: Optional[logging.Logger], level: int, message: str, *args: Any) -> None:
+    # Message arguments are formatted by logging itself, i.e. only when the record is actually emitted
     if not _log_steps_enabled:
         return
     if logger is None:
         return
     try:
-        logger.log(level, message)
+        logger.log(level, message, *args)
     except Exception:
         # Never interfere with test execution due to logging issues
         pass
 
 
 class AggregateError(Exception):
+    _cached_str: Optional[str] = None
+
     def __init__(self, title: str, exceptions: List[BaseException]):
         self.title = title
         self.exceptions = exceptions
-        summary = ", ".join(f"{type(e).__name__}: {e}" for e in exceptions)
-        super().__init__(f"{len(exceptions)} exception(s) occurred during '{title}': {summary}")
+        # Keep the raw parts as args (so the error still pickles); the message is built only when read
+        super().__init__(title, exceptions)
+
+    def __str__(self) -> str:
+        # Reporters may stringify the same error repeatedly; build the message once
+        if self._cached_str is None:
+            summary = ", ".join(f"{type(e).__name__}: {e}" for e in self.exceptions)
+            self._cached_str = f"{len(self.exceptions)} exception(s) occurred during '{self.title}': {summary}"
+        return self._cached_str
 
 
 class _AggregateState:
+    __slots__ = ("title", "exceptions")
+
     def __init__(self, title: str):
         self.title = title
         self.exceptions: List[BaseException] = []
 
 
-_thread_local: threading.local = threading.local()
+# Step stacks live in a context variable so that asyncio tasks / trio coroutines sharing a thread keep
+# separate stacks. Both stacks share one slot, so a step needs a single lookup to reach them. A task copies
+# the context it was started in, so tasks started inside an open step share its stack lists until those
+# empty out; a step entered on empty stacks replaces them with fresh lists in the current context only.
+_StepStacks = Tuple[List[_AggregateState], List["_PropagatingStep"]]
+_step_stacks_var: ContextVar[Optional[_StepStacks]] = ContextVar("allure_ext_step_stacks", default=None)
+
+
+def _get_step_stacks() -> _StepStacks:
+    stacks = _step_stacks_var.get()
+    if stacks is None or not (stacks[0] or stacks[1]):
+        stacks = ([], [])
+        _step_stacks_var.set(stacks)
+    return stacks
 
 
 def _get_aggregate_stack() -> List[_AggregateState]:
-    stack = getattr(_thread_local, "aggregate_stack", None)
-    if stack is None:
-        stack = []
-        _thread_local.aggregate_stack = stack
-    return stack
+    return _get_step_stacks()[0]
+
 
+def _has_open_steps() -> bool:
+    stacks = _step_stacks_var.get()
+    return stacks is not None and bool(stacks[0] or stacks[1])
 
-def _get_propagate_stack() -> List["_PropagatingStep"]:
-    stack = getattr(_thread_local, "propagate_stack", None)
-    if stack is None:
-        stack = []
-        _thread_local.propagate_stack = stack
-    return stack
 
+# Control-flow sentinel exceptions that never count as a step failure; exact types are checked by
+# identity first, which avoids an issubclass() MRO walk for the usual case
+_CONTROL_FLOW_EXC_TYPES: Tuple[Type[BaseException], ...] = (StopIteration, GeneratorExit, StopAsyncIteration)
 
 TraceFunc = Callable[[types.FrameType, str, Any], Optional[Callable[..., Any]]]
+ExcInfo = Tuple[Type[BaseException], BaseException, types.TracebackType]
 
 
-class _PropagatingStep:
-    def __init__(self, title: str, propagate: bool = False, raise_on_parent: bool = False):
-        if allure is None:  # pragma: no cover
-            raise RuntimeError(f"allure is not importable: {_import_error}")
+def _record_caught_exception(step: "_PropagatingStep", exc_info: ExcInfo) -> None:
+    # Preserve the first meaningful exception only
+    if step._caught_exc is None:
+        step._caught_exc = exc_info
+    # Broadcast first meaningful exception to all open propagating steps (parents)
+    _broadcast_observed_exception(step._prop_stack, exc_info)
+
+
+def _broadcast_observed_exception(stack: List["_PropagatingStep"], exc_info: ExcInfo) -> None:
+    # Steps that already observed an exception always sit at the bottom of the stack: the field is never
+    # cleared and newer steps are pushed on top. Scan from the top and stop at the first informed step.
+    for i in range(len(stack) - 1, -1, -1):
+        parent = stack[i]
+        if parent._observed_caught_exc is not None:
+            break
+        parent._observed_caught_exc = exc_info
+
+
+def note_exception(exc: Optional[BaseException] = None) -> None:
+    """
+    Explicitly record a caught exception on the innermost active propagating step.
+
+    Call it inside an ``except`` block without arguments, or pass the exception instance.
+    Does nothing when no ``allure.step(..., propagate=True)`` is active.
+    """
+    stacks = _step_stacks_var.get()
+    if stacks is None or not stacks[1]:
+        return
+    stack = stacks[1]
+    if exc is None:
+        exc_type, exc_val, exc_tb = sys.exc_info()
+        if exc_type is None or exc_val is None or exc_tb is None:
+            return
+        _record_caught_exception(stack[-1], (exc_type, exc_val, exc_tb))
+    elif exc.__traceback__ is not None:
+        _record_caught_exception(stack[-1], (type(exc), exc, exc.__traceback__))
+
+
+# Python 3.12+ (PEP 669): observe exceptions through sys.monitoring instead of sys.settrace
+_monitoring: Any = getattr(sys, "monitoring", None)
+_MONITORING_TOOL_NAME = "allure-propagate"
+# Number of propagating steps (across all threads) relying on RAISE events being enabled
+_monitoring_users: int = 0
+_monitoring_lock = threading.Lock()
+
+
+def _on_monitored_raise(code: types.CodeType, instruction_offset: int, exception: BaseException) -> Any:
+    stacks = _step_stacks_var.get()
+    if stacks is None or not stacks[1]:
+        return None
+    stack = stacks[1]
+    # The callback runs on top of the frame that saw the exception, so match steps by frame identity
+    frame = sys._getframe(1)
+    if _debug_trace:
+        try:
+            print(f"[ALLURE_EXT DEBUG] frame={code.co_name!r} saw exception {type(exception).__name__}: {exception}")
+        except Exception:
+            pass
+    # Ignore control-flow sentinel exceptions which may appear in pytest internals
+    exc_type = type(exception)
+    if exc_type in _CONTROL_FLOW_EXC_TYPES or issubclass(exc_type, _CONTROL_FLOW_EXC_TYPES):
+        return None
+    if exception.__traceback__ is None:
+        return None
+    exc_info = (exc_type, exception, exception.__traceback__)
+    # Recording only updates step fields, the stack itself is not mutated while iterating
+    for step in stack:
+        if step._target_frame is frame:
+            _record_caught_exception(step, exc_info)
+    return None
+
+
+def _reserve_monitoring_tool() -> Optional[int]:
+    if _monitoring is None:
+        return None
+    # Tool ids 3 and 4 are not claimed by any conventional tool (debugger, coverage, profiler, optimizer)
+    for tool_id in (3, 4):
+        owner = _monitoring.get_tool(tool_id)
+        if owner is None:
+            _monitoring.use_tool_id(tool_id, _MONITORING_TOOL_NAME)
+        elif owner != _MONITORING_TOOL_NAME:
+            continue
+        _monitoring.register_callback(tool_id, _monitoring.events.RAISE, _on_monitored_raise)
+        return tool_id
+    return None
+
+
+# Reserved when the wrappers are installed, so merely importing the module does not claim a tool id
+_monitoring_tool_id: Optional[int] = None
+
+
+def _enable_raise_monitoring() -> None:
+    # RAISE cannot be enabled per code object, so it is enabled globally while any propagating step is open
+    global _monitoring_users
+    with _monitoring_lock:
+        if _monitoring_users == 0:
+            _monitoring.set_events(_monitoring_tool_id, _monitoring.events.RAISE)
+        _monitoring_users += 1
+
+
+def _disable_raise_monitoring() -> None:
+    global _monitoring_users
+    with _monitoring_lock:
+        _monitoring_users -= 1
+        if _monitoring_users <= 0:
+            _monitoring_users = 0
+            _monitoring.set_events(_monitoring_tool_id, 0)
+
+
+def _global_trace_stub(frame: types.FrameType, event: str, arg: Any) -> Optional[Callable[..., Any]]:
+    # Global tracer of the settrace fallback: enables frame-local tracing without tracing new frames
+    return None
+
+
+class _WrappedStep:
+    """
+    allure.step wrapper without propagate=True: adds step logging and aggregate/parent bookkeeping.
+
+    raise_on_parent only has an effect together with propagate=True, so it is not stored here.
+    """
+
+    # One instance per step: slots avoid a per-instance __dict__
+    __slots__ = ("_title", "_uuid", "_logger", "_agg_stack", "_prop_stack")
+
+    def __init__(self, title: str):
+        # Only built by the patched allure.step, so allure availability was checked once at patch time
         self._title = title
-        self._propagate = bool(propagate)
-        self._raise_on_parent = bool(raise_on_parent)
-        # Use the original allure.step to avoid recursion after monkey patching
-        assert _original_allure_step is not None, "Original allure.step not captured"
-        self._inner_cm = _original_allure_step(title)
-        self._caught_exc: Optional[Tuple[Type[BaseException], BaseException, types.TracebackType]] = None
-        self._observed_caught_exc: Optional[Tuple[Type[BaseException], BaseException, types.TracebackType]] = None
-        self._target_frame: Optional[types.FrameType] = None
-        self._prev_global_trace: Optional[TraceFunc] = None
-        self._installed_global_trace: bool = False
-        self._prev_local_trace: Optional[TraceFunc] = None
+        self._uuid: UUID
         self._logger: Optional[logging.Logger] = None
+        # Per-context stacks, bound once on __enter__ so __exit__ does not look them up again
+        self._agg_stack: List[_AggregateState]
+        self._prop_stack: List[_PropagatingStep]
 
     def __enter__(self) -> Any:
-        result = self._inner_cm.__enter__()
-        if self._propagate:
-            # Track active propagating steps to broadcast caught exceptions to parents
-            _get_propagate_stack().append(self)
-
-            def _tracer(frame: types.FrameType, event: str, arg: Any) -> Optional[Callable[..., Any]]:
-                # Capture any exception observed within the step body
-                if event == "exception":
-                    exc_type, exc_val, exc_tb = arg
-                    if _debug_trace:
-                        try:
-                            name = getattr(exc_type, "__name__", str(exc_type))
-                            print(f"[ALLURE_EXT DEBUG] step={self._title!r} saw exception {name}: {exc_val}")
-                        except Exception:
-                            pass
-                    # Ignore control-flow sentinel exceptions which may appear in pytest internals
-                    try:
-                        is_control_flow_exc = issubclass(exc_type, (StopIteration, GeneratorExit))
-                    except Exception:
-                        is_control_flow_exc = False
-                    if isinstance(exc_val, BaseException) and not is_control_flow_exc:
-                        exc_info = (exc_type, exc_val, exc_tb)
-                        # Preserve the first meaningful exception only
-                        if self._caught_exc is None:
-                            self._caught_exc = exc_info
-                        # Broadcast first meaningful exception to all open propagating steps (parents)
-                        for step in list(_get_propagate_stack()):
-                            if step._observed_caught_exc is None:
-                                step._observed_caught_exc = exc_info
-                # Chain to any previously installed local tracer so that
-                # parent propagating steps can also observe this exception
-                # when nested propagating steps install their own tracer.
-                if self._prev_local_trace is not None:
-                    try:
-                        result = self._prev_local_trace(frame, event, arg)
-                        # If previous tracer returns something other than None, use that
-                        if result is not None:
-                            return result
-                    except Exception:
-                        # Do not interfere with program flow if previous tracer errs
-                        pass
-                # Only return self to continue tracing - avoid infinite recursion
-                return _tracer
-
-            caller = sys._getframe(1)
-            self._target_frame = caller
+        self._uuid = _start_allure_step(self._title)
+        self._agg_stack, self._prop_stack = _get_step_stacks()
+        if _log_steps_enabled:
             # Acquire a logger tied to the caller's module for source-origin logs
-            self._logger = _resolve_logger_for_frame(caller)
-            _maybe_log(self._logger, logging.INFO, f"[STEP START] {self._title!r}")
-            # Save previously installed tracers
-            self._prev_global_trace = cast(Optional[TraceFunc], sys.gettrace())
-            self._prev_local_trace = cast(Optional[TraceFunc], caller.f_trace)
-
-            # Ensure tracing is enabled so that frame.f_trace receives events.
-            # Under tools like coverage (CTracer), Python-level local tracers are not invoked unless a
-            # Python-level global tracer is active. Force-install a minimal Python tracer for the duration
-            # of this step, then restore the previous tracer on exit.
-            def _global_stub(frame: types.FrameType, event: str, arg: Any) -> Optional[Callable[..., Any]]:
-                return None
-
-            sys.settrace(_global_stub)
-            self._installed_global_trace = True
-
-            # Install local tracer for this frame to observe exceptions
-            caller.f_trace = _tracer
-        else:
-            # Even when propagate is disabled, we still support START logging
-            caller = sys._getframe(1)
-            self._target_frame = caller
-            self._logger = _resolve_logger_for_frame(caller)
-            _maybe_log(self._logger, logging.INFO, f"[STEP START] {self._title!r}")
-        return result
+            self._logger = _resolve_logger_for_frame(sys._getframe(1))
+            _maybe_log(self._logger, logging.INFO, "[STEP START] %r", self._title)
+        return None
 
     def __exit__(
         self,
@@ -223,47 +332,18 @@ class _PropagatingStep:
         exc_val: Optional[BaseException],
         exc_tb: Optional[types.TracebackType],
     ) -> bool:
-        # Remove tracer if installed
-        if self._propagate:
-            # Pop from propagate stack
-            stack = _get_propagate_stack()
-            if stack and stack[-1] is self:
-                stack.pop()
-            else:
-                # Defensive: remove self if present elsewhere
-                try:
-                    stack.remove(self)
-                except ValueError:
-                    pass
-            # Restore previous tracers
-            if self._target_frame is not None:
-                self._target_frame.f_trace = self._prev_local_trace
-            # Restore previous global tracer exactly as it was before entry
-            if self._installed_global_trace:
-                try:
-                    sys.settrace(self._prev_global_trace)
-                finally:
-                    self._installed_global_trace = False
-
-        aggregate_stack = _get_aggregate_stack()
-        in_aggregate = bool(aggregate_stack)
-
-        # If an exception escaped the body, prefer that; else use any observed caught exception
-        active_exc: Optional[Tuple[Type[BaseException], BaseException, types.TracebackType]]
-        if exc_type is not None and exc_val is not None and exc_tb is not None:
-            active_exc = (exc_type, exc_val, exc_tb)
-        else:
-            active_exc = self._caught_exc or self._observed_caught_exc
+        if exc_type is None or exc_val is None or exc_tb is None:
+            self._close_passed()
+            return False
+        # Real exception escaped from body: let it propagate unless an aggregate collected it
+        return self._close_failed(exc_type, exc_val, exc_tb)
 
-        # If we detected a caught exception but nothing escaped and propagate is False, just finish normally
-        if active_exc is None:
-            try:
-                return bool(self._inner_cm.__exit__(exc_type, exc_val, exc_tb))
-            finally:
-                _maybe_log(self._logger, logging.INFO, f"[STEP END] {self._title!r} - PASS")
+    def _close_passed(self) -> None:
+        _stop_allure_step(self._uuid, self._title, None, None, None)
+        _maybe_log(self._logger, logging.INFO, "[STEP END] %r - PASS", self._title)
 
-        # There was an exception observed or escaping
-        et, ev, etb = active_exc
+    def _close_failed(self, et: Type[BaseException], ev: BaseException, etb: types.TracebackType) -> bool:
+        """Close the step as failed; return True when an open aggregate collected the exception."""
         if _debug_trace:
             try:
                 print(f"[ALLURE_EXT DEBUG] __exit__ active_exc for {self._title!r}: {type(ev).__name__}: {ev}")
@@ -271,54 +351,211 @@ class _PropagatingStep:
                 pass
 
         # Ensure parents know about this failure even if tracer missed the exact event
-        try:
-            for step in list(_get_propagate_stack()):
-                if step is not self and step._observed_caught_exc is None:
-                    step._observed_caught_exc = (et, ev, etb)
-        except Exception:
-            pass
-
-        if in_aggregate:
-            # Under aggregate, always mark the step as failed (not broken), regardless of exception type
-            ae = AssertionError(str(ev))
-            self._inner_cm.__exit__(type(ae), ae, ae.__traceback__)
-            _maybe_log(self._logger, logging.INFO, f"[STEP END] {self._title!r} - FAIL")
+        # (a propagating step has already popped itself from the stack at this point)
+        _broadcast_observed_exception(self._prop_stack, (et, ev, etb))
+
+        aggregate_stack = self._agg_stack
+        if aggregate_stack:
+            # Under aggregate, always mark the step as failed (not broken), regardless of exception type.
+            # Assertion errors already map to "failed"; others are re-typed but keep the real traceback.
+            if isinstance(ev, AssertionError):
+                _stop_allure_step(self._uuid, self._title, et, ev, etb)
+            else:
+                _stop_allure_step(self._uuid, self._title, AssertionError, AssertionError(str(ev)), etb)
+            _maybe_log(self._logger, logging.INFO, "[STEP END] %r - FAIL", self._title)
             # Collect the original exception and suppress to continue siblings
             aggregate_stack[-1].exceptions.append(ev)
             return True
 
         # Not in aggregate: mark step according to the real exception
-        self._inner_cm.__exit__(et, ev, etb)
-        _maybe_log(self._logger, logging.INFO, f"[STEP END] {self._title!r} - FAIL")
+        _stop_allure_step(self._uuid, self._title, et, ev, etb)
+        _maybe_log(self._logger, logging.INFO, "[STEP END] %r - FAIL", self._title)
+        return False
+
 
-        # Outside aggregate
-        if exc_type is not None:
-            # Real exception escaped from body: let it propagate
+class _PropagatingStep(_WrappedStep):
+    """allure.step(..., propagate=True): fails the step on exceptions caught inside its body."""
+
+    __slots__ = (
+        "_raise_on_parent",
+        "_caught_exc",
+        "_observed_caught_exc",
+        "_target_frame",
+        "_prev_global_trace",
+        "_installed_global_trace",
+        "_prev_local_trace",
+        "_local_trace",
+        "_prev_trace_lines",
+    )
+
+    def __init__(self, title: str, raise_on_parent: bool = False):
+        super().__init__(title)
+        self._raise_on_parent = bool(raise_on_parent)
+        self._caught_exc: Optional[ExcInfo] = None
+        self._observed_caught_exc: Optional[ExcInfo] = None
+        self._target_frame: Optional[types.FrameType] = None
+        self._prev_global_trace: Optional[TraceFunc] = None
+        self._installed_global_trace: bool = False
+        self._prev_local_trace: Optional[TraceFunc] = None
+        self._local_trace: Optional[TraceFunc] = None
+        self._prev_trace_lines: Optional[bool] = None
+
+    def __enter__(self) -> Any:
+        self._uuid = _start_allure_step(self._title)
+        self._agg_stack, self._prop_stack = _get_step_stacks()
+        # Track active propagating steps to broadcast caught exceptions to parents
+        self._prop_stack.append(self)
+
+        caller = sys._getframe(1)
+        self._target_frame = caller
+        if _log_steps_enabled:
+            # Acquire a logger tied to the caller's module for source-origin logs
+            self._logger = _resolve_logger_for_frame(caller)
+            _maybe_log(self._logger, logging.INFO, "[STEP START] %r", self._title)
+
+        if _monitoring_tool_id is not None:
+            # PEP 669: only RAISE events are delivered, code runs untraced until an exception occurs
+            _enable_raise_monitoring()
+            return None
+
+        # Save previously installed tracers
+        self._prev_global_trace = sys.gettrace()
+        self._prev_local_trace = caller.f_trace
+
+        # Ensure tracing is enabled so that frame.f_trace receives events.
+        # Under tools like coverage (CTracer), Python-level local tracers are not invoked unless a
+        # Python-level global tracer is active. Force-install a minimal Python tracer for the duration
+        # of this step, then restore the previous tracer on exit. An enclosing propagating step may
+        # have installed it already, in which case there is nothing to do.
+        if self._prev_global_trace is not _global_trace_stub:
+            sys.settrace(_global_trace_stub)
+            self._installed_global_trace = True
+
+        # Install local tracer for this frame to observe exceptions. Only "exception" events matter,
+        # so unless another local tracer relies on them, suppress per-line events for the step body.
+        # The bound method is kept so that the tracer hands back the same callable on every event;
+        # the chaining variant is only needed when the frame already had a local tracer.
+        if self._prev_local_trace is None:
+            self._local_trace = self._trace
+            self._prev_trace_lines = caller.f_trace_lines
+            caller.f_trace_lines = False
+        else:
+            self._local_trace = self._trace_chained
+        caller.f_trace = self._local_trace
+        return None
+
+    def _observe_traced_exception(self, arg: Any) -> None:
+        exc_type, exc_val, exc_tb = arg
+        if _debug_trace:
+            try:
+                name = getattr(exc_type, "__name__", str(exc_type))
+                print(f"[ALLURE_EXT DEBUG] step={self._title!r} saw exception {name}: {exc_val}")
+            except Exception:
+                pass
+        # Ignore control-flow sentinel exceptions which may appear in pytest internals
+        is_control_flow_exc = exc_type in _CONTROL_FLOW_EXC_TYPES or issubclass(exc_type, _CONTROL_FLOW_EXC_TYPES)
+        if isinstance(exc_val, BaseException) and not is_control_flow_exc:
+            _record_caught_exception(self, (exc_type, exc_val, exc_tb))
+
+    def _trace(self, frame: types.FrameType, event: str, arg: Any) -> Optional[Callable[..., Any]]:
+        # Local tracer of the settrace fallback: capture any exception observed within the step body
+        if event == "exception":
+            self._observe_traced_exception(arg)
+        return self._local_trace
+
+    def _trace_chained(self, frame: types.FrameType, event: str, arg: Any) -> Optional[Callable[..., Any]]:
+        # Same as _trace, for frames that already had a local tracer (e.g. an enclosing propagating step)
+        if event == "exception":
+            self._observe_traced_exception(arg)
+        # Chain to the previously installed local tracer so that
+        # parent propagating steps can also observe this exception
+        # when nested propagating steps install their own tracer.
+        prev_trace = self._prev_local_trace
+        if prev_trace is not None:
+            try:
+                result = prev_trace(frame, event, arg)
+                # If previous tracer returns something other than None, use that
+                if result is not None:
+                    return result
+            except Exception:
+                # Do not interfere with program flow if previous tracer errs
+                pass
+        # Only return self to continue tracing - avoid infinite recursion
+        return self._local_trace
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[types.TracebackType],
+    ) -> bool:
+        # Pop from propagate stack
+        stack = self._prop_stack
+        if stack and stack[-1] is self:
+            stack.pop()
+        else:
+            # Defensive: remove self if present elsewhere (by identity, innermost first)
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i] is self:
+                    del stack[i]
+                    break
+        # Remove tracer if installed
+        if _monitoring_tool_id is not None:
+            _disable_raise_monitoring()
+        # Restore previous tracers
+        elif self._target_frame is not None:
+            self._target_frame.f_trace = self._prev_local_trace
+            # Drop the bound tracer (it references this step) to avoid keeping a reference cycle
+            self._local_trace = None
+            if self._prev_trace_lines is not None:
+                self._target_frame.f_trace_lines = self._prev_trace_lines
+        # Restore previous global tracer exactly as it was before entry
+        if self._installed_global_trace:
+            try:
+                sys.settrace(self._prev_global_trace)
+            finally:
+                self._installed_global_trace = False
+
+        # If an exception escaped the body, prefer that
+        if exc_type is not None and exc_val is not None and exc_tb is not None:
+            return self._close_failed(exc_type, exc_val, exc_tb)
+
+        # Else use any observed caught exception
+        active_exc = self._caught_exc or self._observed_caught_exc
+        if active_exc is None:
+            self._close_passed()
             return False
 
-        # No exception escaped but we saw a caught one and propagate=True
-        # Marked failed already above; only raise if configured to do so
-        if self._propagate and self._raise_on_parent:
-            raise ev
+        if self._close_failed(*active_exc):
+            return True
+
+        # No exception escaped but we saw a caught one: marked failed already above;
+        # only raise if configured to do so
+        if self._raise_on_parent:
+            raise active_exc[1]
         # Otherwise, continue without raising
         return True
 
 
 class _AggregateStep:
+    __slots__ = ("_title", "_uuid", "_logger", "_agg_stack")
+
     def __init__(self, title: str):
         if allure is None:  # pragma: no cover
             raise RuntimeError(f"allure is not importable: {_import_error}")
         self._title = title
-        assert _original_allure_step is not None, "Original allure.step not captured"
-        self._inner_cm = _original_allure_step(title)
+        self._uuid: UUID
         self._logger: Optional[logging.Logger] = None
+        self._agg_stack: List[_AggregateState]
 
     def __enter__(self) -> Any:
-        _get_aggregate_stack().append(_AggregateState(self._title))
-        caller = sys._getframe(1)
-        self._logger = _resolve_logger_for_frame(caller)
-        _maybe_log(self._logger, logging.INFO, f"[STEP START] {self._title!r}")
-        return self._inner_cm.__enter__()
+        self._agg_stack = _get_aggregate_stack()
+        self._agg_stack.append(_AggregateState(self._title))
+        if _log_steps_enabled:
+            self._logger = _resolve_logger_for_frame(sys._getframe(1))
+            _maybe_log(self._logger, logging.INFO, "[STEP START] %r", self._title)
+        self._uuid = _start_allure_step(self._title)
+        return None
 
     def __exit__(
         self,
@@ -326,9 +563,8 @@ class _AggregateStep:
         exc_val: Optional[BaseException],
         exc_tb: Optional[types.TracebackType],
     ) -> bool:
-        stack = _get_aggregate_stack()
+        stack = self._agg_stack
         state = stack.pop() if stack else _AggregateState(self._title)
-        in_parent_aggregate = bool(stack)
 
         # If the aggregate body raised, collect that exception and suppress for now
         local_exc_type = exc_type
@@ -341,11 +577,12 @@ class _AggregateStep:
         if state.exceptions:
             # Mark the aggregate step as failed with an aggregated error
             agg_err = AggregateError(self._title, state.exceptions)
-            # Force allure status to failed for the aggregate step
-            ae = AssertionError(str(agg_err))
-            self._inner_cm.__exit__(type(ae), ae, ae.__traceback__)
-            _maybe_log(self._logger, logging.INFO, f"[STEP END] {self._title!r} - FAIL")
-            if in_parent_aggregate:
+            # Force allure status to failed for the aggregate step (AggregateError itself would be "broken").
+            # Wrapping agg_err as the single arg keeps the message lazy: str(ae) is str(agg_err), built once
+            ae = AssertionError(agg_err)
+            _stop_allure_step(self._uuid, self._title, AssertionError, ae, agg_err.__traceback__)
+            _maybe_log(self._logger, logging.INFO, "[STEP END] %r - FAIL", self._title)
+            if stack:
                 # Defer raising to the parent aggregate; collect into parent and continue
                 stack[-1].exceptions.append(agg_err)
                 return True
@@ -354,9 +591,10 @@ class _AggregateStep:
 
         # Close the step normally (no errors aggregated)
         try:
-            return bool(self._inner_cm.__exit__(local_exc_type, local_exc_val, local_exc_tb))
+            _stop_allure_step(self._uuid, self._title, local_exc_type, local_exc_val, local_exc_tb)
+            return False
         finally:
-            _maybe_log(self._logger, logging.INFO, f"[STEP END] {self._title!r} - PASS")
+            _maybe_log(self._logger, logging.INFO, "[STEP END] %r - PASS", self._title)
 
 
 def aggregate_step(title: str) -> _AggregateStep:
@@ -366,10 +604,7 @@ def aggregate_step(title: str) -> _AggregateStep:
 def _monkey_patch_allure() -> None:
     if allure is None:  # pragma: no cover
         return
-    try:
-        version = metadata.version("allure-pytest")
-    except metadata.PackageNotFoundError:  # pragma: no cover
-        version = None
+    version = _ALLURE_VERSION
     # Version guard: inclusive range check with optional override via env
     if not _is_truthy_env("ALLURE_EXT_ALLOW_VERSION_MISMATCH"):
         v_tuple = _parse_version_to_tuple(version)
@@ -389,15 +624,29 @@ def _monkey_patch_allure() -> None:
     if original_step is None:
         return
 
-    def step(title: str, propagate: bool = False, raise_on_parent: bool = False) -> _PropagatingStep:
-        return _PropagatingStep(title=title, propagate=propagate, raise_on_parent=raise_on_parent)
+    global _original_allure_step
+    if _original_allure_step is not None:
+        # Wrappers already installed (e.g. pytest_configure ran again in the same process)
+        return
+    _original_allure_step = original_step
+    upstream_step = _original_allure_step
+
+    global _monitoring_tool_id
+    _monitoring_tool_id = _reserve_monitoring_tool()
+
+    def step(title: str, propagate: bool = False, raise_on_parent: bool = False) -> Any:
+        if propagate:
+            return _PropagatingStep(title, raise_on_parent=raise_on_parent)
+        # raise_on_parent has no effect without propagate=True. Unless step logging is enabled or an
+        # aggregate/propagating step is open, the wrapper would behave exactly like upstream allure.step
+        if not _log_steps_enabled and not _has_open_steps():
+            return upstream_step(title)
+        return _WrappedStep(title)
 
     # Install wrappers
-    global _original_allure_step
-    if _original_allure_step is None:
-        _original_allure_step = cast(Callable[[str], Any], original_step)
     setattr(allure, "step", step)
     setattr(allure, "aggregate_step", aggregate_step)
+    setattr(allure, "note_exception", note_exception)
 
 
 def pytest_addoption(parser: Any) -> None:  # pragma: no cover - executed by pytest at collection time
@@ -419,14 +668,7 @@ def pytest_configure(config: Any) -> None:  # pragma: no cover - executed by pyt
     _monkey_patch_allure()
     # Resolve logging toggle from CLI/INI/env (any truthy enables)
     env_enabled = os.environ.get("ALLURE_EXT_LOG_STEPS") or os.environ.get("ALLURE_LOG_STEPS")
-    ini_enabled = False
-    try:
-        ini_enabled = bool(config.getini("allure_log_steps"))
-    except Exception:
-        ini_enabled = False
-    cli_enabled = False
-    try:
-        cli_enabled = bool(getattr(config.option, "allure_log_steps", False))
-    except Exception:
-        cli_enabled = False
+    # Both options are registered by pytest_addoption above, so they are always present
+    ini_enabled = bool(config.getini("allure_log_steps"))
+    cli_enabled = bool(config.option.allure_log_steps)
     set_step_logging(bool(env_enabled) or ini_enabled or cli_enabled)
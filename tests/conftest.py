@@ -1 +1,41 @@
-# Intentionally empty: the plugin is auto-discovered via pytest entry points
+# The plugin itself is auto-discovered via pytest entry points; this only wires up generated-test runs
+from __future__ import annotations
+
+import re
+from typing import Any, Dict
+
+import pytest
+
+from tests.utils_allure import run_pytest_batch_and_collect
+
+
+def pytest_configure(config: Any) -> None:
+    config.addinivalue_line(
+        "markers",
+        "generated_test(code): source of a test module run in a nested pytest session, see the generated_run fixture",
+    )
+
+
+@pytest.fixture(scope="module")
+def _generated_module_runs(request: Any) -> Dict[str, Dict[str, Any]]:
+    # Run the generated sources of every selected test in this module in a single nested pytest session
+    cases: Dict[str, str] = {}
+    for item in request.session.items:
+        marker = item.get_closest_marker("generated_test")
+        if marker is not None and getattr(item, "module", None) is request.module:
+            module_name = _generated_module_name(item.nodeid)
+            if module_name in cases:
+                raise ValueError(f"generated module name {module_name!r} of {item.nodeid!r} is already taken")
+            cases[module_name] = marker.args[0]
+    return run_pytest_batch_and_collect(cases)
+
+
+def _generated_module_name(nodeid: str) -> str:
+    # Node ids may hold parametrization ids ("test_x[a-b]"), so only identifier characters are kept
+    return "test_" + re.sub(r"\W", "_", nodeid)
+
+
+@pytest.fixture
+def generated_run(request: Any, _generated_module_runs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Outcome (exit code, output, parsed allure results) of this test's ``generated_test`` source."""
+    return _generated_module_runs[_generated_module_name(request.node.nodeid)]
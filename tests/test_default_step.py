@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from tests.utils_allure import run_pytest_and_collect
+from typing import Any, Dict
+
+import allure
+import pytest
+
+from tests.utils_allure import capture_steps
 
 
 def _get_only_test(results):
@@ -10,18 +15,17 @@ def _get_only_test(results):
 
 
 def test_step_passes_no_exception() -> None:
-    code = "import allure\n" "def test_case():\n" "    with allure.step('S1'):\n" "        pass\n"
-    out = run_pytest_and_collect(code)
-    assert out["exit_code"] == 0
-    test = _get_only_test(out)
-    assert test["status"] == "passed"
-    assert [s["name"] for s in test["steps"]] == ["S1"]
-    assert test["steps"][0]["status"] == "passed"
+    with capture_steps() as captor:
+        with allure.step("S1"):
+            pass
+    assert captor.stop_order == [("S1", False)]
 
 
-def test_step_fails_on_uncaught_exception() -> None:
-    code = "import allure\n" "def test_case():\n" "    with allure.step('S1'):\n" "        raise Exception('boom')\n"
-    out = run_pytest_and_collect(code)
+@pytest.mark.generated_test(
+    "import allure\n" "def test_case():\n" "    with allure.step('S1'):\n" "        raise Exception('boom')\n"
+)
+def test_step_fails_on_uncaught_exception(generated_run: Dict[str, Any]) -> None:
+    out = generated_run
     assert out["exit_code"] != 0
     test = _get_only_test(out)
     assert test["status"] in {"failed", "broken"}
@@ -30,31 +34,24 @@ def test_step_fails_on_uncaught_exception() -> None:
 
 
 def test_step_green_when_exception_caught_inside() -> None:
-    code = (
-        "import allure\n"
-        "def test_case():\n"
-        "    with allure.step('S1'):\n"
-        "        try:\n"
-        "            raise Exception('x')\n"
-        "        except Exception:\n"
-        "            pass\n"
-    )
-    out = run_pytest_and_collect(code)
-    assert out["exit_code"] == 0
-    test = _get_only_test(out)
-    assert test["status"] == "passed"
-    assert test["steps"][0]["status"] == "passed"
+    with capture_steps() as captor:
+        with allure.step("S1"):
+            try:
+                raise Exception("x")
+            except Exception:
+                pass
+    assert captor.stop_order == [("S1", False)]
 
 
-def test_nested_steps_uncaught_bubbles() -> None:
-    code = (
-        "import allure\n"
-        "def test_case():\n"
-        "    with allure.step('P'):\n"
-        "        with allure.step('C'):\n"
-        "            raise Exception('x')\n"
-    )
-    out = run_pytest_and_collect(code)
+@pytest.mark.generated_test(
+    "import allure\n"
+    "def test_case():\n"
+    "    with allure.step('P'):\n"
+    "        with allure.step('C'):\n"
+    "            raise Exception('x')\n"
+)
+def test_nested_steps_uncaught_bubbles(generated_run: Dict[str, Any]) -> None:
+    out = generated_run
     assert out["exit_code"] != 0
     test = _get_only_test(out)
     assert test["status"] in {"failed", "broken"}
@@ -66,14 +63,7 @@ def test_nested_steps_uncaught_bubbles() -> None:
 
 
 def test_attachments_do_not_affect_status() -> None:
-    code = (
-        "import allure\n"
-        "def test_case():\n"
-        "    with allure.step('S1'):\n"
-        "        allure.attach('hello', 'note', 'text/plain')\n"
-    )
-    out = run_pytest_and_collect(code)
-    assert out["exit_code"] == 0
-    test = _get_only_test(out)
-    assert test["steps"][0]["name"] == "S1"
-    assert test["steps"][0]["status"] == "passed"
+    with capture_steps() as captor:
+        with allure.step("S1"):
+            allure.attach("hello", "note", "text/plain")
+    assert captor.stop_order == [("S1", False)]
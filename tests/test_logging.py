@@ -1,20 +1,42 @@
 from __future__ import annotations
 
+import functools
 import logging
 import re
+import sys
+from typing import Iterator
 
 import allure
+import pytest
+from allure_commons._core import plugin_manager
 
+from allure_pytest_ext import plugin
 from allure_pytest_ext.plugin import set_step_logging
+from tests.utils_allure import capture_steps, run_pytest_batch_and_collect
+
+
+@functools.lru_cache(maxsize=32)
+def _compile(pattern: str) -> re.Pattern[str]:
+    return re.compile(pattern)
 
 
 def _find_messages(records, pattern: str) -> list[str]:
-    regex = re.compile(pattern)
-    return [r.getMessage() for r in records if regex.search(r.getMessage() or "")]  # type: ignore[attr-defined]
+    regex = _compile(pattern)
+    # Every step message starts with "[STEP ", so a prefix check rules out unrelated records before the regex
+    return [m for r in records if (m := r.getMessage()).startswith("[STEP ") and regex.search(m)]
+
+
+@pytest.fixture
+def step_logging_on() -> Iterator[None]:
+    set_step_logging(True)
+    try:
+        yield
+    finally:
+        set_step_logging(False)
 
 
 def test_step_logging_is_disabled_by_default(caplog) -> None:
-    caplog.set_level(logging.INFO)
+    caplog.set_level(logging.INFO, logger=__name__)
     caplog.clear()
     with allure.step("log-off step test"):
         pass
@@ -22,53 +44,62 @@ def test_step_logging_is_disabled_by_default(caplog) -> None:
     assert msgs == []
 
 
-def test_step_logging_on_emits_start_and_end_from_source_logger(caplog) -> None:
-    try:
-        set_step_logging(True)
-        caplog.set_level(logging.INFO)
-        caplog.clear()
-        with allure.step("sample step title"):
+def test_step_logging_on_emits_start_and_end_from_source_logger(caplog, step_logging_on: None) -> None:
+    caplog.set_level(logging.INFO, logger=__name__)
+    caplog.clear()
+    with allure.step("sample step title"):
+        pass
+    # Expect exactly two messages for this step
+    title = "sample step title"
+    msgs = _find_messages(caplog.records, r"^\[STEP (START|END)\] '%s'" % re.escape(title))
+    assert "[STEP START] 'sample step title'" in msgs
+    assert "[STEP END] 'sample step title' - PASS" in msgs
+    # Ensure records originate from the current test module's logger
+    assert all(r.name == __name__ for r in caplog.records if r.getMessage().startswith("[STEP "))
+
+
+def test_step_logging_failed_end_on_caught_error_with_propagate_true(caplog, step_logging_on: None) -> None:
+    caplog.set_level(logging.INFO, logger=__name__)
+    caplog.clear()
+    with allure.step("failing step", propagate=True):
+        try:
+            raise ValueError("boom")
+        except ValueError:
             pass
-        # Expect exactly two messages for this step
-        title = "sample step title"
-        msgs = _find_messages(caplog.records, r"^\[STEP (START|END)\] '%s'" % re.escape(title))
-        assert any(m == "[STEP START] 'sample step title'" for m in msgs)
-        assert any(m == "[STEP END] 'sample step title' - PASS" for m in msgs)
-        # Ensure records originate from the current test module's logger
-        assert all(r.name == __name__ for r in caplog.records if r.getMessage().startswith("[STEP "))
-    finally:
-        set_step_logging(False)
+    msgs = _find_messages(caplog.records, r"^\[STEP END\] 'failing step' - FAIL")
+    assert msgs, msgs
+    assert all(r.name == __name__ for r in caplog.records if r.getMessage().startswith("[STEP "))
 
 
-def test_step_logging_failed_end_on_caught_error_with_propagate_true(caplog) -> None:
-    try:
-        set_step_logging(True)
-        caplog.set_level(logging.INFO)
-        caplog.clear()
-        with allure.step("failing step", propagate=True):
-            try:
-                raise ValueError("boom")
-            except ValueError:
-                pass
-        msgs = _find_messages(caplog.records, r"^\[STEP END\] 'failing step' - FAIL")
-        assert msgs, msgs
-        assert all(r.name == __name__ for r in caplog.records if r.getMessage().startswith("[STEP "))
-    finally:
-        set_step_logging(False)
+def test_aggregate_step_logging_emits_start_and_end(caplog, step_logging_on: None) -> None:
+    caplog.set_level(logging.INFO, logger=__name__)
+    caplog.clear()
+    with allure.aggregate_step("parent aggregate"):
+        with allure.step("child pass"):
+            pass
+    title = "parent aggregate"
+    msgs = _find_messages(caplog.records, rf"^\[STEP (START|END)\] '{re.escape(title)}'")
+    assert "[STEP START] 'parent aggregate'" in msgs
+    assert "[STEP END] 'parent aggregate' - PASS" in msgs
+    assert all(r.name == __name__ for r in caplog.records if r.getMessage().startswith("[STEP "))
 
 
-def test_aggregate_step_logging_emits_start_and_end(caplog) -> None:
-    try:
-        set_step_logging(True)
-        caplog.set_level(logging.INFO)
-        caplog.clear()
-        with allure.aggregate_step("parent aggregate"):
-            with allure.step("child pass"):
-                pass
-        title = "parent aggregate"
-        msgs = _find_messages(caplog.records, rf"^\[STEP (START|END)\] '{re.escape(title)}'")
-        assert any(m == "[STEP START] 'parent aggregate'" for m in msgs)
-        assert any(m == "[STEP END] 'parent aggregate' - PASS" for m in msgs)
-        assert all(r.name == __name__ for r in caplog.records if r.getMessage().startswith("[STEP "))
-    finally:
-        set_step_logging(False)
+def test_generated_runs_leave_outer_session_state_alone(step_logging_on: None) -> None:
+    # The nested session configures the plugin (and allure-pytest) again; none of that may leak out
+    allure_plugins = set(plugin_manager.get_plugins())
+    outcome = run_pytest_batch_and_collect({"test_state_probe": "def test_probe():\n    pass\n"})
+    assert outcome["test_state_probe"]["exit_code"] == 0
+    assert plugin._log_steps_enabled is True
+    assert set(plugin_manager.get_plugins()) == allure_plugins
+    assert not any(name.endswith("test_state_probe") for name in sys.modules)
+
+
+def test_generated_runs_hide_their_steps_from_outer_allure_plugins() -> None:
+    # Stands in for the outer session's allure listener when it runs with --alluredir
+    code = "import allure\n\n\ndef test_probe():\n    with allure.step('inner'):\n        pass\n"
+    with capture_steps() as captor:
+        outcome = run_pytest_batch_and_collect({"test_listener_probe": code})
+        assert plugin_manager.is_registered(captor)
+    assert captor.starts == []
+    (test,) = outcome["test_listener_probe"]["results"]["tests"]
+    assert test["steps"] == [{"name": "inner", "status": "passed", "steps": []}]
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from tests.utils_allure import run_pytest_and_collect
+from typing import Any, Dict
+
+import pytest
 
 
 def _get_only_test(results):
@@ -9,21 +11,21 @@ def _get_only_test(results):
     return tests[0]
 
 
-def test_raise_on_parent_deferred_to_parent_exit_first_parent() -> None:
-    code = (
-        "import allure, pytest\n"
-        "def test_case():\n"
-        "    with pytest.raises(ValueError):\n"
-        "        with allure.step('P', propagate=True, raise_on_parent=True):\n"
-        "            with allure.step('C1', propagate=True):\n"
-        "                try:\n"
-        "                    raise ValueError('boom')\n"
-        "                except ValueError:\n"
-        "                    pass\n"
-        "            with allure.step('C2'):\n"
-        "                pass\n"
-    )
-    out = run_pytest_and_collect(code)
+@pytest.mark.generated_test(
+    "import allure, pytest\n"
+    "def test_case():\n"
+    "    with pytest.raises(ValueError):\n"
+    "        with allure.step('P', propagate=True, raise_on_parent=True):\n"
+    "            with allure.step('C1', propagate=True):\n"
+    "                try:\n"
+    "                    raise ValueError('boom')\n"
+    "                except ValueError:\n"
+    "                    pass\n"
+    "            with allure.step('C2'):\n"
+    "                pass\n"
+)
+def test_raise_on_parent_deferred_to_parent_exit_first_parent(generated_run: Dict[str, Any]) -> None:
+    out = generated_run
     print(out["stdout"])
     assert out["exit_code"] == 0
     test = _get_only_test(out)
@@ -33,20 +35,20 @@ def test_raise_on_parent_deferred_to_parent_exit_first_parent() -> None:
     assert parent["steps"][1]["status"] == "passed"
 
 
-def test_raise_on_parent_multiple_children_aggregated_by_parent_flag_only() -> None:
-    code = (
-        "import allure, pytest\n"
-        "def test_case():\n"
-        "    with pytest.raises(AssertionError):\n"
-        "        with allure.step('P', propagate=True, raise_on_parent=True):\n"
-        "            for i in range(2):\n"
-        "                with allure.step(f'C{i+1}', propagate=True):\n"
-        "                    try:\n"
-        "                        assert False, f'e{i+1}'\n"
-        "                    except AssertionError:\n"
-        "                        pass\n"
-    )
-    out = run_pytest_and_collect(code)
+@pytest.mark.generated_test(
+    "import allure, pytest\n"
+    "def test_case():\n"
+    "    with pytest.raises(AssertionError):\n"
+    "        with allure.step('P', propagate=True, raise_on_parent=True):\n"
+    "            for i in range(2):\n"
+    "                with allure.step(f'C{i+1}', propagate=True):\n"
+    "                    try:\n"
+    "                        assert False, f'e{i+1}'\n"
+    "                    except AssertionError:\n"
+    "                        pass\n"
+)
+def test_raise_on_parent_multiple_children_aggregated_by_parent_flag_only(generated_run: Dict[str, Any]) -> None:
+    out = generated_run
     assert out["exit_code"] == 0
     test = _get_only_test(out)
     parent = test["steps"][0]
@@ -54,15 +56,15 @@ def test_raise_on_parent_multiple_children_aggregated_by_parent_flag_only() -> N
     assert all(child["status"] in {"failed", "broken"} for child in parent["steps"])
 
 
-def test_raise_on_parent_no_failures_no_raise() -> None:
-    code = (
-        "import allure\n"
-        "def test_case():\n"
-        "    with allure.step('P', propagate=True, raise_on_parent=True):\n"
-        "        with allure.step('C1', propagate=True):\n"
-        "            pass\n"
-    )
-    out = run_pytest_and_collect(code)
+@pytest.mark.generated_test(
+    "import allure\n"
+    "def test_case():\n"
+    "    with allure.step('P', propagate=True, raise_on_parent=True):\n"
+    "        with allure.step('C1', propagate=True):\n"
+    "            pass\n"
+)
+def test_raise_on_parent_no_failures_no_raise(generated_run: Dict[str, Any]) -> None:
+    out = generated_run
     assert out["exit_code"] == 0
     test = _get_only_test(out)
     parent = test["steps"][0]
@@ -70,18 +72,18 @@ def test_raise_on_parent_no_failures_no_raise() -> None:
     assert parent["steps"][0]["status"] == "passed"
 
 
-def test_raise_on_parent_without_parent_behaves_like_self_raise() -> None:
-    code = (
-        "import allure, pytest\n"
-        "def test_case():\n"
-        "    with pytest.raises(AssertionError):\n"
-        "        with allure.step('C', propagate=True, raise_on_parent=True):\n"
-        "            try:\n"
-        "                assert False, 'x'\n"
-        "            except AssertionError:\n"
-        "                pass\n"
-    )
-    out = run_pytest_and_collect(code)
+@pytest.mark.generated_test(
+    "import allure, pytest\n"
+    "def test_case():\n"
+    "    with pytest.raises(AssertionError):\n"
+    "        with allure.step('C', propagate=True, raise_on_parent=True):\n"
+    "            try:\n"
+    "                assert False, 'x'\n"
+    "            except AssertionError:\n"
+    "                pass\n"
+)
+def test_raise_on_parent_without_parent_behaves_like_self_raise(generated_run: Dict[str, Any]) -> None:
+    out = generated_run
     assert out["exit_code"] == 0
     test = _get_only_test(out)
     # Test passed under pytest.raises; step should be marked failed
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from allure_commons._core import plugin_manager
-from typing import Dict, Tuple
+import asyncio
+import pickle
+from typing import Any, List, Tuple
 import allure
+import allure_commons
 import pytest
 
 from allure_pytest_ext.plugin import AggregateError
+from tests.utils_allure import StepCapturePlugin
 
 
 def test_step_propagate_caught_exception_marks_failed_does_not_raise() -> None:
@@ -69,36 +73,8 @@ def test_aggregate_captures_propagated_caught() -> None:
     assert "KeyError" in str(excinfo.value)
 
 
-class _StepCapturePlugin:
-    def __init__(self) -> None:
-        self.title_by_uuid: Dict[str, str] = {}
-        self.failed_by_uuid: Dict[str, bool] = {}
-        self.stop_order: list[Tuple[str, bool]] = []
-
-    def start_step(self, uuid: str, title: str, params) -> None:  # type: ignore[no-untyped-def]
-        self.title_by_uuid[uuid] = title
-
-    def stop_step(  # type: ignore[no-untyped-def]
-        self,
-        uuid: str,
-        title: str,
-        exc_type,
-        exc_val,
-        exc_tb,
-    ) -> None:
-        # Default allure behavior: any non-None exc marks step as failed
-        # Record title on stop as well to avoid relying on start ordering
-        self.title_by_uuid[uuid] = title
-        self.failed_by_uuid[uuid] = exc_type is not None
-        self.stop_order.append((title, exc_type is not None))
-
-
-def _titles_with_status(captor: _StepCapturePlugin) -> Dict[str, bool]:
-    return {captor.title_by_uuid[u]: captor.failed_by_uuid.get(u, False) for u in captor.title_by_uuid}
-
-
 def test_default_allure_failure_propagates_upwards_marks_all_outer_failed() -> None:
-    captor = _StepCapturePlugin()
+    captor = StepCapturePlugin()
     plugin_manager.register(captor, name="capture_default_prop")
     try:
         with pytest.raises(ValueError):
@@ -116,7 +92,7 @@ def test_default_allure_failure_propagates_upwards_marks_all_outer_failed() -> N
 
 
 def test_default_allure_catch_in_parent_makes_above_green_below_red() -> None:
-    captor = _StepCapturePlugin()
+    captor = StepCapturePlugin()
     plugin_manager.register(captor, name="capture_catch_parent")
     try:
         with allure.step("top"):
@@ -131,10 +107,8 @@ def test_default_allure_catch_in_parent_makes_above_green_below_red() -> None:
         # If no events observed (environment limitation), skip status assertions
         if not captor.stop_order:
             pytest.skip("Allure step events not emitted; cannot assert visual statuses")
-        # Two deepest steps (last to stop) should be failed; upper ones should be green
-        assert len(captor.stop_order) == 4
-        titles, results = zip(*captor.stop_order)
-        assert results[0] is False and results[1] is False and results[2] is True and results[3] is True
+        # Two deepest steps (first to stop) should be failed; upper ones should be green
+        assert captor.stop_order == [("leaf", True), ("mid", True), ("parent-catch", False), ("top", False)]
     finally:
         plugin_manager.unregister(name="capture_catch_parent")
 
@@ -181,3 +155,82 @@ def test_aggregate_single_child_failure_still_runs_siblings_and_raises() -> None
     msg = str(excinfo.value)
     assert "1 exception(s)" in msg and "AssertionError: boom" in msg
     assert executed == ["ok-1", "fail-start", "ok-2"]
+
+
+def test_note_exception_records_on_innermost_propagating_step() -> None:
+    with pytest.raises(KeyError, match="noted"):
+        with allure.step("noted step", propagate=True, raise_on_parent=True):
+            try:
+                raise KeyError("noted")
+            except KeyError:
+                allure.note_exception()
+
+
+def test_note_exception_outside_propagating_step_is_noop() -> None:
+    with allure.step("plain step"):
+        try:
+            raise KeyError("ignored")
+        except KeyError as e:
+            allure.note_exception(e)
+
+
+def test_step_stacks_are_isolated_between_asyncio_tasks() -> None:
+    async def _aggregating() -> None:
+        with allure.aggregate_step("task aggregate"):
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+    async def _plain() -> None:
+        await asyncio.sleep(0)
+        # Runs while the other task's aggregate is open; must not be collected by it
+        with allure.step("task plain"):
+            raise ValueError("not aggregated")
+
+    async def _main() -> List[object]:
+        return list(await asyncio.gather(_aggregating(), _plain(), return_exceptions=True))
+
+    results = asyncio.run(_main())
+    assert results[0] is None
+    assert isinstance(results[1], ValueError)
+
+
+def test_aggregate_error_message_is_built_on_demand_and_pickles() -> None:
+    err = AggregateError("agg", [ValueError("v"), KeyError("k")])
+    assert str(err) == "2 exception(s) occurred during 'agg': ValueError: v, KeyError: 'k'"
+    clone = pickle.loads(pickle.dumps(err))
+    assert str(clone) == str(err)
+
+
+def test_aggregate_error_is_not_swallowed_by_except_assertion_error() -> None:
+    with pytest.raises(AggregateError):
+        try:
+            with allure.aggregate_step("agg"):
+                with allure.step("child"):
+                    raise ValueError("v")
+        except AssertionError:  # pragma: no cover - AggregateError must not be an AssertionError
+            pass
+
+
+class _StopValueCapture:
+    def __init__(self) -> None:
+        self.stops: List[Tuple[Any, Any]] = []
+
+    @allure_commons.hookimpl
+    def stop_step(self, uuid: Any, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.stops.append((exc_type, exc_val))
+
+
+def test_aggregate_step_is_stopped_as_failed_without_formatting_its_message() -> None:
+    captor = _StopValueCapture()
+    plugin_manager.register(captor, name="capture_aggregate_stop")
+    try:
+        with pytest.raises(AggregateError) as excinfo:
+            with allure.aggregate_step("agg"):
+                with allure.step("child"):
+                    raise ValueError("v")
+    finally:
+        plugin_manager.unregister(name="capture_aggregate_stop")
+    exc_type, exc_val = captor.stops[-1]
+    # Reported as an AssertionError (failed, not broken) that only wraps the raised AggregateError
+    assert exc_type is AssertionError and exc_val.args == (excinfo.value,)
+    assert str(exc_val) == str(excinfo.value)
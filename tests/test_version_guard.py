@@ -1,53 +1,71 @@
 from __future__ import annotations
 
-import importlib
 import sys
 import warnings
-from typing import Any
+from typing import Any, Iterator
+
+import allure
+import pytest
+
+import allure_pytest_ext
 
 _ALLURE_MIN_SUPPORTED_VERSION = "2.13.3"
 _ALLURE_MAX_SUPPORTED_VERSION = "2.15.0"
 
 
-def _reload_plugin(monkeypatch: Any) -> Any:
-    if "allure_pytest_ext.plugin" in sys.modules:
-        del sys.modules["allure_pytest_ext.plugin"]
+def _reload_plugin() -> Any:
+    # Dropping the cached module is enough for a fresh import: the module body runs exactly once
+    sys.modules.pop("allure_pytest_ext.plugin", None)
     import allure_pytest_ext.plugin as plugin  # type: ignore
 
-    importlib.reload(plugin)
     return plugin
 
 
-def test_min_max_constants(monkeypatch: Any) -> None:
-    plugin = _reload_plugin(monkeypatch)
+@pytest.fixture(scope="module")
+def plugin() -> Iterator[Any]:
+    # A single fresh import serves the whole module: tests only change env/attributes through monkeypatch.
+    # Everything the fresh module replaces is put back afterwards, so later tests see the original plugin
+    original = sys.modules["allure_pytest_ext.plugin"]
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "allure_pytest_ext.plugin", original)
+        mp.setattr(allure_pytest_ext, "plugin", original)
+        mp.setattr(original, "_original_allure_step", original._original_allure_step)
+        for name in ("step", "aggregate_step", "note_exception"):
+            mp.setattr(allure, name, getattr(allure, name))
+        yield _reload_plugin()
+    tool_id = original._monitoring_tool_id
+    if tool_id is not None:
+        # The fresh module took over the shared sys.monitoring tool id with its own RAISE callback
+        original._monitoring.register_callback(tool_id, original._monitoring.events.RAISE, original._on_monitored_raise)
+
+
+def test_min_max_constants(plugin: Any) -> None:
     assert getattr(plugin, "_ALLURE_MIN_VERSION") == _ALLURE_MIN_SUPPORTED_VERSION
     assert getattr(plugin, "_ALLURE_MAX_VERSION") == _ALLURE_MAX_SUPPORTED_VERSION
 
 
-def test_no_warning_for_versions_inside_range(monkeypatch: Any) -> None:
-    plugin = _reload_plugin(monkeypatch)
+def test_no_warning_for_versions_inside_range(plugin: Any, monkeypatch: Any) -> None:
     monkeypatch.setenv("ALLURE_EXT_ALLOW_VERSION_MISMATCH", "")
-    monkeypatch.setattr(plugin.metadata, "version", lambda name: _ALLURE_MIN_SUPPORTED_VERSION)
+    monkeypatch.setattr(plugin, "_ALLURE_VERSION", _ALLURE_MIN_SUPPORTED_VERSION)
     with warnings.catch_warnings(record=True) as w:
         warnings.simplefilter("always")
         plugin._monkey_patch_allure()
         assert not [wi for wi in w if issubclass(wi.category, RuntimeWarning)]
 
-    monkeypatch.setattr(plugin.metadata, "version", lambda name: _ALLURE_MAX_SUPPORTED_VERSION)
+    monkeypatch.setattr(plugin, "_ALLURE_VERSION", _ALLURE_MAX_SUPPORTED_VERSION)
     with warnings.catch_warnings(record=True) as w:
         warnings.simplefilter("always")
         plugin._monkey_patch_allure()
         assert not [wi for wi in w if issubclass(wi.category, RuntimeWarning)]
 
 
-def test_warning_for_versions_outside_range(monkeypatch: Any) -> None:
-    plugin = _reload_plugin(monkeypatch)
+def test_warning_for_versions_outside_range(plugin: Any, monkeypatch: Any) -> None:
     monkeypatch.setenv("ALLURE_EXT_ALLOW_VERSION_MISMATCH", "")
     _max_version_patch = int(_ALLURE_MAX_SUPPORTED_VERSION.split(".")[-1])
     monkeypatch.setattr(
-        plugin.metadata,
-        "version",
-        lambda name: _ALLURE_MAX_SUPPORTED_VERSION.replace(f".{_max_version_patch}", f".{_max_version_patch + 1}")
+        plugin,
+        "_ALLURE_VERSION",
+        _ALLURE_MAX_SUPPORTED_VERSION.replace(f".{_max_version_patch}", f".{_max_version_patch + 1}"),
     )
     with warnings.catch_warnings(record=True) as w:
         warnings.simplefilter("always")
@@ -56,10 +74,9 @@ def test_warning_for_versions_outside_range(monkeypatch: Any) -> None:
         assert any(f"expected in [{_ALLURE_MIN_SUPPORTED_VERSION}, {_ALLURE_MAX_SUPPORTED_VERSION}]" in m for m in msgs)
 
 
-def test_env_override_suppresses_warning(monkeypatch: Any) -> None:
-    plugin = _reload_plugin(monkeypatch)
+def test_env_override_suppresses_warning(plugin: Any, monkeypatch: Any) -> None:
     monkeypatch.setenv("ALLURE_EXT_ALLOW_VERSION_MISMATCH", "1")
-    monkeypatch.setattr(plugin.metadata, "version", lambda name: "9.9.9")
+    monkeypatch.setattr(plugin, "_ALLURE_VERSION", "9.9.9")
     with warnings.catch_warnings(record=True) as w:
         warnings.simplefilter("always")
         plugin._monkey_patch_allure()
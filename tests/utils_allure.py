@@ -1,92 +1,289 @@
 from __future__ import annotations
 
+import contextlib
+import functools
+import importlib
+import io
 import json
 import os
 import subprocess
 import sys
 import tempfile
+from xml.etree import ElementTree
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 
+import allure_commons
+import pytest
+from allure_commons._core import plugin_manager
 
-def _collect_step(step: Dict[str, Any]) -> Dict[str, Any]:
-    return {
-        "name": step.get("name"),
-        "status": step.get("status"),
-        "steps": [_collect_step(s) for s in step.get("steps", [])],
-    }
+_json_loads: Callable[[bytes], Any]
+try:  # orjson is optional: faster parsing of allure result files when installed
+    import orjson  # type: ignore[import-not-found,unused-ignore]
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _json_loads = json.loads
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+class StepCapturePlugin:
+    """allure_commons hook implementation recording step starts/stops (register it on plugin_manager)."""
+
+    def __init__(self) -> None:
+        # Raw (uuid, title) / (uuid, failed) events; the dict views are only built when asked for
+        self.starts: List[Tuple[Any, str]] = []
+        self.stops: List[Tuple[Any, bool]] = []
+
+    @allure_commons.hookimpl
+    def start_step(self, uuid: Any, title: str, params: Any) -> None:
+        self.starts.append((uuid, title))
+
+    @allure_commons.hookimpl
+    def stop_step(self, uuid: Any, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        # Default allure behavior: any non-None exc marks step as failed
+        self.stops.append((uuid, exc_type is not None))
+
+    @property
+    def stop_order(self) -> List[Tuple[str, bool]]:
+        title_by_uuid = dict(self.starts)
+        return [(title_by_uuid[uuid], failed) for uuid, failed in self.stops]
+
+
+@contextlib.contextmanager
+def capture_steps() -> Iterator[StepCapturePlugin]:
+    """Record the allure steps started/stopped in the current process while the block runs."""
+    captor = StepCapturePlugin()
+    plugin_manager.register(captor)
+    try:
+        yield captor
+    finally:
+        plugin_manager.unregister(captor)
+
+
+def _collect_steps(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Iterative walk (no call frame per nested step); each node is appended to its parent's list in order
+    collected: List[Dict[str, Any]] = []
+    pending = [(step, collected) for step in reversed(steps)]
+    while pending:
+        step, parent_steps = pending.pop()
+        get = step.get
+        children: List[Dict[str, Any]] = []
+        parent_steps.append({"name": get("name"), "status": get("status"), "steps": children})
+        pending.extend((child, children) for child in reversed(get("steps", [])))
+    return collected
 
 
 def parse_allure_results(alluredir: str) -> Dict[str, Any]:
-    directory = Path(alluredir)
     tests: List[Dict[str, Any]] = []
-    for path in sorted(directory.glob("*-result.json")):
-        try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        tests.append(
-            {
-                "name": data.get("name"),
-                "status": data.get("status"),
-                "statusDetails": data.get("statusDetails", {}),
-                "steps": [_collect_step(s) for s in data.get("steps", [])],
-            }
-        )
+    # A single directory listing, filtered by suffix (no glob pattern matching or Path objects). Files are
+    # parsed in listing order: results are looked up per module by fullName, so their order is irrelevant
+    with os.scandir(alluredir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("-result.json"):
+                continue
+            try:
+                with open(entry.path, "rb") as fh:
+                    data = _json_loads(fh.read())
+            except Exception:
+                continue
+            tests.append(
+                {
+                    "name": data.get("name"),
+                    "fullName": data.get("fullName"),
+                    "status": data.get("status"),
+                    "statusDetails": data.get("statusDetails", {}),
+                    "steps": _collect_steps(data.get("steps", [])),
+                }
+            )
     return {"tests": tests}
 
 
-def run_pytest_and_collect(code: str) -> Dict[str, Any]:
-    with tempfile.TemporaryDirectory() as td:
-        td_path = Path(td)
-        tests_dir = td_path / "tests"
-        tests_dir.mkdir(parents=True, exist_ok=True)
-        test_file = tests_dir / "test_generated.py"
-        test_file.write_text(code, encoding="utf-8")
-
-        allure_out = td_path / "allure"
-        allure_out.mkdir(parents=True, exist_ok=True)
-
-        env = os.environ.copy()
-        # Ensure our plugin/package (in src layout) is importable and auto-loaded
-        project_root = Path(__file__).resolve().parents[1]
-        src_path = str(project_root / "src")
-        root_path = str(project_root)
-        env["PYTHONPATH"] = os.pathsep.join([src_path, root_path, env.get("PYTHONPATH", "")])
-        env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "0"
-
-        # Prevent pytest-cov/coverage from activating inside the subprocess — mixing its data with
-        # branch-enabled coverage in the main session can cause combine errors.
-        for key in [
-            "PYTEST_ADDOPTS",
-            "COVERAGE_PROCESS_START",
-            "COVERAGE_FILE",
-            "COVERAGE_RCFILE",
-        ]:
+def parse_junit_outcomes(junit_xml: str) -> Dict[str, Dict[str, Any]]:
+    """Exit code and output per test module, rebuilt from a pytest junit xml report."""
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    try:
+        root = ElementTree.parse(junit_xml).getroot()
+    except (OSError, ElementTree.ParseError):
+        return outcomes
+    for case in root.iter("testcase"):
+        classname = case.get("classname") or ""
+        # "<module>[.<class>]" for test reports; a module that failed to import only has its name
+        module = classname.split(".", 1)[0] if classname else case.get("name", "")
+        outcome = outcomes.setdefault(module, {"exit_code": 0, "stdout": "", "stderr": ""})
+        for child in case:
+            text = child.text or ""
+            if child.tag in {"failure", "error"}:
+                outcome["exit_code"] = 1
+                outcome["stdout"] += f"{child.get('message', '')}\n{text}\n"
+            elif child.tag == "system-out":
+                outcome["stdout"] += text
+            elif child.tag == "system-err":
+                outcome["stderr"] += text
+    return outcomes
+
+
+def run_pytest_batch_and_collect(cases: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run several generated test modules in a single pytest session.
+
+    Keys of ``cases`` are used as module names (so they must be valid ``test_*`` identifiers).
+    Returns the outcome (exit code, output, parsed allure results) per case. Exit code and output come from
+    pytest's own per-test reports of that module, as if it had been run on its own.
+    """
+    if not cases:
+        return {}
+    out = _run_pytest(cases)
+    by_module: Dict[str, List[Dict[str, Any]]] = {case_id: [] for case_id in cases}
+    for test in out["results"]["tests"]:
+        # fullName is "<package>.<module>#<test name>"
+        module = str(test.get("fullName") or "").split("#", 1)[0].rsplit(".", 1)[-1]
+        if module in by_module:
+            by_module[module].append(test)
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    for case_id, tests in by_module.items():
+        # A module without any test report collected nothing: pytest's "no tests collected" exit code
+        module_outcome = out["modules"].get(case_id, {"exit_code": 5, "stdout": "", "stderr": ""})
+        outcomes[case_id] = {**module_outcome, "results": {"tests": tests}}
+    return outcomes
+
+
+def _write_snippets(modules: Dict[str, str], tests_dir: Path) -> None:
+    tests_dir.mkdir()
+    for module_name, code in modules.items():
+        fd = os.open(str(tests_dir / f"{module_name}.py"), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            # Encoded once and written straight to the descriptor (no buffered text wrapper)
+            os.write(fd, code.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+
+@functools.lru_cache(maxsize=None)
+def _run_root() -> tempfile.TemporaryDirectory[str]:
+    # One temporary root per session, removed at interpreter exit; each run only adds a subdirectory
+    return tempfile.TemporaryDirectory(prefix="allure_ext_runs_")
+
+
+def _run_pytest(modules: Dict[str, str]) -> Dict[str, Any]:
+    # Sources and results of a run live in its own directory under the session's temporary root
+    run_dir = tempfile.mkdtemp(dir=_run_root().name)
+    tests_dir = Path(run_dir) / "generated"
+    _write_snippets(modules, tests_dir)
+    allure_out = Path(run_dir) / "allure"
+    allure_out.mkdir()
+    junit_xml = Path(run_dir) / "junit.xml"
+
+    args = [
+        "-q",
+        "--no-header",
+        # Plugins a single throwaway run has no use for
+        "-p",
+        "no:cacheprovider",
+        "-p",
+        "no:stepwise",
+        "-p",
+        "no:faulthandler",
+        "-p",
+        "no:xdist",
+        # Keep pytest-cov of the outer session from being configured a second time
+        "-p",
+        "no:pytest_cov",
+        "-o",
+        "addopts=",
+        # Per-test outcomes and captured output, split per module afterwards (see parse_junit_outcomes)
+        f"--junitxml={junit_xml}",
+        "-o",
+        "junit_logging=out-err",
+        # A module failing to import must not hide the outcomes of the other modules in the batch
+        "--continue-on-collection-errors",
+        "--import-mode=importlib",
+        f"--rootdir={tests_dir}",
+        f"--alluredir={str(allure_out)}",
+        str(tests_dir),
+    ]
+    if os.environ.get("ALLURE_EXT_TEST_SUBPROCESS"):
+        # Opt-in full isolation: a fresh interpreter per run
+        exit_code, stdout, stderr = _run_pytest_subprocess(args, cwd=run_dir)
+    else:
+        exit_code, stdout, stderr = _run_pytest_inprocess(args, tests_dir)
+    results = parse_allure_results(str(allure_out))
+    return {
+        "exit_code": exit_code,
+        "stdout": stdout,
+        "stderr": stderr,
+        "results": results,
+        "modules": parse_junit_outcomes(str(junit_xml)),
+    }
+
+
+def _run_pytest_inprocess(args: List[str], tests_dir: Path) -> Tuple[int, str, str]:
+    # A nested pytest session avoids starting an interpreter and importing pytest/allure again for
+    # every run; allure-pytest and this plugin are loaded through their entry points, as in the outer session
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    saved_modules = set(sys.modules)
+    saved_addopts = os.environ.pop("PYTEST_ADDOPTS", None)
+    # allure_commons' plugin manager is global: suspend the outer session's allure plugins (its listener and
+    # file logger when run with --alluredir), so they neither see the nested steps nor stay shadowed afterwards
+    outer_allure_plugins = plugin_manager.list_name_plugin()
+    for _, allure_plugin in outer_allure_plugins:
+        plugin_manager.unregister(allure_plugin)
+    # The nested session's pytest_configure resets step logging from its own (empty) options
+    ext_plugin = importlib.import_module("allure_pytest_ext.plugin")
+    saved_log_steps = ext_plugin._log_steps_enabled
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exit_code = int(pytest.main(args))
+    finally:
+        if saved_addopts is not None:
+            os.environ["PYTEST_ADDOPTS"] = saved_addopts
+        ext_plugin.set_step_logging(saved_log_steps)
+        # allure-pytest does not unregister everything it registered in the nested session
+        for allure_plugin in plugin_manager.get_plugins():
+            plugin_manager.unregister(allure_plugin)
+        for name, allure_plugin in outer_allure_plugins:
+            plugin_manager.register(allure_plugin, name=name)
+        # Drop the generated modules (only those) so later runs can reuse the same module names
+        generated_prefix = os.path.realpath(tests_dir) + os.sep
+        for name in set(sys.modules) - saved_modules:
+            module_file = getattr(sys.modules[name], "__file__", None)
+            if module_file and os.path.realpath(module_file).startswith(generated_prefix):
+                del sys.modules[name]
+    return exit_code, stdout.getvalue(), stderr.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def _subprocess_env() -> Dict[str, str]:
+    # Built once per session: every subprocess run shares it (subprocess.run does not modify it)
+    env = os.environ.copy()
+    # Ensure our plugin/package (in src layout) is importable and auto-loaded
+    src_path = str(_PROJECT_ROOT / "src")
+    root_path = str(_PROJECT_ROOT)
+    env["PYTHONPATH"] = os.pathsep.join([src_path, root_path, env.get("PYTHONPATH", "")])
+    env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "0"
+
+    # Prevent pytest-cov/coverage from activating inside the subprocess — mixing its data with
+    # branch-enabled coverage in the main session can cause combine errors.
+    for key in [
+        "PYTEST_ADDOPTS",
+        "COVERAGE_PROCESS_START",
+        "COVERAGE_FILE",
+        "COVERAGE_RCFILE",
+    ]:
+        env.pop(key, None)
+    for key in list(env.keys()):
+        if key.startswith("COV_CORE_"):
             env.pop(key, None)
-        for key in list(env.keys()):
-            if key.startswith("COV_CORE_"):
-                env.pop(key, None)
-
-        cmd = [
-            sys.executable,
-            "-m",
-            "pytest",
-            "-q",
-            "-p",
-            "no:pytest_cov",
-            "-p",
-            "allure_pytest",
-            "-p",
-            "allure_pytest_ext.plugin",
-            f"--alluredir={str(allure_out)}",
-            str(tests_dir),
-        ]
-        proc = subprocess.run(cmd, cwd=str(td_path), env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        results = parse_allure_results(str(allure_out))
-        return {
-            "exit_code": proc.returncode,
-            "stdout": proc.stdout.decode("utf-8", errors="replace"),
-            "stderr": proc.stderr.decode("utf-8", errors="replace"),
-            "results": results,
-        }
+    return env
+
+
+def _run_pytest_subprocess(args: List[str], cwd: str) -> Tuple[int, str, str]:
+    cmd = [sys.executable, "-m", "pytest", "-p", "allure_pytest", "-p", "allure_pytest_ext.plugin", *args]
+    proc = subprocess.run(cmd, cwd=cwd, env=_subprocess_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return (
+        proc.returncode,
+        proc.stdout.decode("utf-8", errors="replace"),
+        proc.stderr.decode("utf-8", errors="replace"),
+    )
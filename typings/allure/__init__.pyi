@@ -34,3 +34,4 @@ attachment_type: enum.Enum
 parameter_mode: enum.Enum
 
 def aggregate_step(title: str) -> _AnyContextManager: ...
+def note_exception(exc: Optional[BaseException] = ...) -> None: ...